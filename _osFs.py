@@ -6,11 +6,635 @@ ezFS access into the current filesystem
 import typing
 from abc import abstractmethod
 import os
+import re
+import fnmatch
+import functools
+import sys
+import errno
+import stat
 import shutil
+import itertools
+import selectors
+import threading
+import time
+import struct
+import weakref
 from paths import asUrl, UrlCompatible, URL
 import ezFs
 
 
+# inotify(7) constants (see /usr/include/linux/inotify.h)
+_IN_MODIFY=0x00000002
+_IN_ATTRIB=0x00000004
+_IN_MOVED_FROM=0x00000040
+_IN_MOVED_TO=0x00000080
+_IN_CREATE=0x00000100
+_IN_DELETE=0x00000200
+_IN_DELETE_SELF=0x00000400
+_IN_MOVE_SELF=0x00000800
+_IN_IGNORED=0x00008000
+_IN_NONBLOCK=os.O_NONBLOCK
+_IN_CLOEXEC=getattr(os,'O_CLOEXEC',0)
+_IN_WATCH_MASK=_IN_CREATE|_IN_MODIFY|_IN_DELETE|_IN_MOVED_FROM|_IN_MOVED_TO|_IN_ATTRIB \
+    |_IN_DELETE_SELF|_IN_MOVE_SELF
+_IN_EVENT=struct.Struct('iIII') # wd, mask, cookie, len
+_IN_ACTIONS=(
+    (_IN_CREATE|_IN_MOVED_TO,"CREATE"), # moved to = renamed in from somewhere else
+    (_IN_DELETE,"DELETE"), # NOTE: _IN_DELETE_SELF is decided by _Inotify._rewatch()
+    (_IN_MOVED_FROM|_IN_MOVE_SELF,"RENAME"),
+    (_IN_MODIFY|_IN_ATTRIB,"UPDATE"),
+)
+
+# fanotify(7) constants (see /usr/include/linux/fanotify.h)
+_AT_FDCWD=-100
+_FAN_CLASS_NOTIF=0x00000000
+_FAN_CLOEXEC=0x00000001
+_FAN_NONBLOCK=0x00000002
+_FAN_REPORT_FID=0x00000200
+_FAN_MARK_ADD=0x00000001
+_FAN_MARK_FILESYSTEM=0x00000100
+_FAN_MODIFY=0x00000002
+_FAN_MOVED_FROM=0x00000040
+_FAN_MOVED_TO=0x00000080
+_FAN_CREATE=0x00000100
+_FAN_DELETE=0x00000200
+_FAN_Q_OVERFLOW=0x00004000
+_FAN_ONDIR=0x40000000
+_FAN_WATCH_MASK=_FAN_MODIFY|_FAN_CREATE|_FAN_DELETE|_FAN_MOVED_FROM|_FAN_MOVED_TO|_FAN_ONDIR
+_FAN_EVENT_INFO_TYPE_FID=1
+_FAN_EVENT=struct.Struct('=IBBHQii') # event_len, vers, reserved, metadata_len, mask, fd, pid
+_FAN_INFO_HEADER=struct.Struct('=BBH') # info_type, pad, len
+_FAN_FILE_HANDLE_OFFSET=_FAN_INFO_HEADER.size+8 # after the header and fsid
+_FAN_ACTIONS=(
+    (_FAN_CREATE|_FAN_MOVED_TO,"CREATE"),
+    (_FAN_DELETE,"DELETE"),
+    (_FAN_MOVED_FROM,"RENAME"),
+    (_FAN_MODIFY,"UPDATE"),
+)
+
+# don't let anyone poll the disk faster than this (in seconds)
+MIN_POLLING_INTERVAL=1.0
+
+# buffer size for file i/o.  Large, so bulk reads/writes take fewer syscalls.
+FILE_BUFFER_SIZE=1<<20
+
+# how many directory entries to read at a time
+DIR_BATCH_SIZE=256
+
+# translate a file:// url path into an os path
+_URL_TO_OS=str.maketrans({'/':os.sep})
+
+# does a path segment contain glob wildcards?
+_GLOB_MAGIC=re.compile('[*?[]')
+
+@functools.lru_cache(maxsize=256)
+def _compileGlobSegment(segment:str)->typing.Callable[[str],typing.Optional[typing.Match]]:
+    """
+    compile a single wildcard path segment into a regex match function
+
+    Remembered, because the same patterns tend to get used over and over.
+    Like the filesystem, this is case-insensitive on windows.
+    """
+    flags=re.IGNORECASE if os.name=='nt' else 0
+    return re.compile(fnmatch.translate(segment),flags).match
+
+# when the stat cache gets this big, throw out whatever has expired
+STAT_CACHE_PURGE_SIZE=4096
+
+_libc:typing.Any=None
+def _getLibc()->typing.Any:
+    """
+    get the c runtime library, loading it on first use
+    """
+    global _libc # pylint: disable=global-statement
+    if _libc is None:
+        import ctypes
+        import ctypes.util
+        _libc=ctypes.CDLL(ctypes.util.find_library('c'),use_errno=True)
+    return _libc
+
+
+class _Inotify:
+    """
+    A single linux inotify instance, shared by all the watches on an OsFs.
+
+    The kernel pushes events to us, so there is no polling at all.
+    Its fd is registered with the OsFs watcher selector, which
+    calls dispatch() whenever there are events to read.
+    """
+
+    def __init__(self):
+        import ctypes
+        self.fd:int=_getLibc().inotify_init1(_IN_NONBLOCK|_IN_CLOEXEC)
+        if self.fd<0:
+            err=ctypes.get_errno()
+            raise OSError(err,os.strerror(err))
+        self._watches:typing.Dict[int,typing.List[_InotifyWatch]]={}
+        self._lock=threading.Lock()
+
+    def fileno(self)->int:
+        """
+        the inotify fd, so this can be registered with a selector
+        """
+        return self.fd
+
+    @property
+    def isIdle(self)->bool:
+        """
+        whether nothing is being watched any more
+        """
+        with self._lock:
+            return not self._watches
+
+    def close(self)->None:
+        """
+        close the inotify fd
+
+        Only the watcher thread calls this, so it can't happen mid-dispatch()
+        """
+        os.close(self.fd)
+
+    def add(self,source:str,watchFn:ezFs.WatcherFn)->"_InotifyWatch":
+        """
+        start watching a file or directory
+        """
+        watch=_InotifyWatch(self,-1,source,watchFn)
+        with self._lock:
+            self._addWatch(watch)
+        return watch
+
+    def _addWatch(self,watch:"_InotifyWatch")->None:
+        """
+        (re)register a watch with the kernel
+
+        The caller must hold _lock.
+        """
+        import ctypes
+        wd=_getLibc().inotify_add_watch(self.fd,os.fsencode(watch.source),_IN_WATCH_MASK)
+        if wd<0:
+            err=ctypes.get_errno()
+            raise OSError(err,os.strerror(err),watch.source)
+        watch.wd=wd
+        self._watches.setdefault(wd,[]).append(watch)
+
+    def remove(self,watch:"_InotifyWatch")->None:
+        """
+        stop watching
+        """
+        with self._lock:
+            watch.stopped=True
+            watches=self._watches.get(watch.wd)
+            if watches is None or watch not in watches:
+                return
+            watches.remove(watch)
+            if watches:
+                # somebody else is still watching the same thing
+                return
+            del self._watches[watch.wd]
+        _getLibc().inotify_rm_watch(self.fd,watch.wd)
+
+    def dispatch(self)->None:
+        """
+        drain all pending events and send them to the watches
+        """
+        while True:
+            try:
+                buf=os.read(self.fd,65536)
+            except BlockingIOError: # EAGAIN, we've read everything
+                return
+            offset=0
+            while offset<len(buf):
+                wd,mask,_,nameLen=_IN_EVENT.unpack_from(buf,offset)
+                offset+=_IN_EVENT.size
+                name=None
+                if nameLen:
+                    name=os.fsdecode(buf[offset:offset+nameLen].rstrip(b'\0'))
+                    offset+=nameLen
+                if mask&_IN_IGNORED:
+                    self._rewatch(wd)
+                    continue
+                with self._lock:
+                    watches=list(self._watches.get(wd,()))
+                for watch in watches:
+                    watch.notify(mask,name)
+
+    def _rewatch(self,wd:int)->None:
+        """
+        The kernel dropped a watch because what it was watching went away.
+
+        If something new is at the same path (eg, an editor saved by writing
+        a new file and renaming it over the old one) then watch that instead,
+        otherwise we would never hear about it again.
+        """
+        events=[]
+        # NOTE: hold the lock throughout, so a remove() can't slip in
+        # between taking a watch off and putting it back
+        with self._lock:
+            for watch in self._watches.pop(wd,[]):
+                if watch.stopped:
+                    continue
+                try:
+                    self._addWatch(watch)
+                except OSError:
+                    events.append((watch,_IN_DELETE)) # really gone
+                else:
+                    events.append((watch,_IN_MODIFY))
+        for watch,mask in events:
+            if not watch.stopped:
+                watch.notify(mask,None)
+
+
+class _InotifyWatch:
+    """
+    Watches a single file or directory using a shared _Inotify
+    """
+
+    def __init__(self,inotify:_Inotify,wd:int,source:str,watchFn:ezFs.WatcherFn):
+        self.inotify=inotify
+        self.wd=wd
+        self.source=source
+        self.watchFn=watchFn
+        self.stopped=False
+
+    def notify(self,mask:int,name:typing.Optional[str])->None:
+        """
+        translate an inotify event and send it to the watchFn
+        """
+        filename=self.source
+        if name:
+            filename=os.path.join(self.source,name)
+        for actionMask,action in _IN_ACTIONS:
+            if mask&actionMask:
+                try:
+                    self.watchFn(filename,action)
+                except Exception as e: # pylint: disable=broad-except
+                    # cannot have this throw or it would prevent others executing
+                    print(e)
+
+    def stop(self)->None:
+        """
+        stop watching
+        """
+        self.inotify.remove(self)
+
+
+class _FanotifyWatch:
+    """
+    Watches everything under a mount point using linux fanotify.
+
+    The kernel reports the whole filesystem the mount is on (which may
+    also be mounted elsewhere), so anything outside the mount point is
+    filtered out here.
+
+    Its fd is registered with the OsFs watcher selector, which
+    calls dispatch() whenever there are events to read.
+
+    Events identify things by file handle, which are turned back into
+    paths with open_by_handle_at().  For creates, deletes, and renames
+    the handle is of the directory where it happened, so that is
+    the path reported.
+    """
+
+    def __init__(self,mountpath:str,watchFn:ezFs.WatcherFn):
+        import ctypes
+        self.mountpath=mountpath
+        self._mountPrefix=mountpath.rstrip(os.sep)+os.sep
+        self.watchFn=watchFn
+        self.filesystem:typing.Optional["OsFs"]=None # set once it's registered
+        libc=_getLibc()
+        libc.fanotify_mark.argtypes=(ctypes.c_int,ctypes.c_uint,ctypes.c_uint64,
+            ctypes.c_int,ctypes.c_char_p)
+        self.fd:int=libc.fanotify_init(
+            _FAN_CLASS_NOTIF|_FAN_CLOEXEC|_FAN_NONBLOCK|_FAN_REPORT_FID,os.O_RDONLY)
+        if self.fd<0:
+            err=ctypes.get_errno()
+            raise OSError(err,os.strerror(err),mountpath)
+        # NOTE: directory entry events (create, delete, move) are
+        # only allowed on filesystem marks, not mount marks
+        if libc.fanotify_mark(self.fd,_FAN_MARK_ADD|_FAN_MARK_FILESYSTEM,
+            _FAN_WATCH_MASK,_AT_FDCWD,os.fsencode(mountpath))<0:
+            err=ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(err,os.strerror(err),mountpath)
+        try:
+            self._mountFd=os.open(mountpath,os.O_RDONLY|os.O_DIRECTORY)
+        except OSError:
+            os.close(self.fd)
+            raise
+
+    def fileno(self)->int:
+        """
+        the fanotify fd, so this can be registered with a selector
+        """
+        return self.fd
+
+    def _handleToPath(self,handle:bytes)->typing.Optional[str]:
+        """
+        turn a struct file_handle back into a path
+
+        :return: None if it no longer exists
+        """
+        import ctypes
+        fd=_getLibc().open_by_handle_at(self._mountFd,ctypes.c_char_p(handle),os.O_PATH)
+        if fd<0:
+            return None
+        try:
+            return os.readlink(f'/proc/self/fd/{fd}')
+        finally:
+            os.close(fd)
+
+    def dispatch(self)->None:
+        """
+        drain all pending events and send them to the watchFn
+        """
+        while True:
+            try:
+                buf=os.read(self.fd,65536)
+            except BlockingIOError: # EAGAIN, we've read everything
+                return
+            offset=0
+            while offset<len(buf):
+                eventLen,_,_,metadataLen,mask,_,_=_FAN_EVENT.unpack_from(buf,offset)
+                filename=None
+                infoOffset=offset+metadataLen
+                while infoOffset<offset+eventLen:
+                    infoType,_,infoLen=_FAN_INFO_HEADER.unpack_from(buf,infoOffset)
+                    if infoType==_FAN_EVENT_INFO_TYPE_FID:
+                        handle=buf[infoOffset+_FAN_FILE_HANDLE_OFFSET:infoOffset+infoLen]
+                        filename=self._handleToPath(handle)
+                        break
+                    infoOffset+=infoLen
+                offset+=eventLen
+                if mask&_FAN_Q_OVERFLOW:
+                    # lost events, so we don't know what changed
+                    self._notify(self.mountpath,'UPDATE')
+                    continue
+                if filename is None:
+                    continue # already gone, so we can't tell where it was
+                if filename!=self.mountpath and not filename.startswith(self._mountPrefix):
+                    continue # somewhere else on the same filesystem
+                # the kernel merges events on the same thing, so
+                # report every action it has bits for
+                for actionMask,action in _FAN_ACTIONS:
+                    if mask&actionMask:
+                        self._notify(filename,action)
+
+    def _notify(self,filename:str,action:str)->None:
+        """
+        call the watchFn without letting it throw
+        """
+        try:
+            self.watchFn(filename,action)
+        except Exception as e: # pylint: disable=broad-except
+            # cannot have this throw or it would prevent others executing
+            print(e)
+
+    def stop(self)->None:
+        """
+        stop watching
+        """
+        filesystem,self.filesystem=self.filesystem,None
+        if filesystem is not None:
+            filesystem._releaseOnWatcher(self) # pylint: disable=protected-access
+
+    def close(self)->None:
+        """
+        close the fds
+
+        Only the watcher thread calls this, so it can't happen mid-dispatch()
+        """
+        os.close(self.fd)
+        os.close(self._mountFd)
+
+
+class _WindowsWatch:
+    """
+    Watches a directory tree using windows ReadDirectoryChangesW.
+
+    The read is overlapped (asynchronous) so that the thread
+    can wait on both it and a stop event, allowing stop() to
+    cleanly cancel it.
+
+    See also:
+        http://timgolden.me.uk/python/win32_how_do_i/watch_directory_for_changes.html
+    """
+
+    ACTIONS={
+        1 : "CREATE",
+        2 : "DELETE",
+        3 : "UPDATE",
+        4 : "CREATE", # actually renamed in from somewhere else
+        5 : "RENAME"
+    }
+
+    # NB Tim Juchcinski reports that he needed to up
+    # the buffer size to be sure of picking up all
+    # events when a large number of files were
+    # deleted at once.  64k is the max allowed over a network.
+    BUFFER_SIZE=65536
+
+    def __init__(self,source:str,watchFn:ezFs.WatcherFn):
+        import win32con
+        import win32file
+        import win32event
+        self.source=source
+        self.watchFn=watchFn
+        FILE_LIST_DIRECTORY = 0x0001
+        self._hDir = win32file.CreateFile ( # pylint: disable=c-extension-no-member
+            source,
+            FILE_LIST_DIRECTORY,
+            win32con.FILE_SHARE_READ | win32con.FILE_SHARE_WRITE | win32con.FILE_SHARE_DELETE,
+            None,
+            win32con.OPEN_EXISTING,
+            win32con.FILE_FLAG_BACKUP_SEMANTICS | win32con.FILE_FLAG_OVERLAPPED,
+            None
+        )
+        self._stopEvent=win32event.CreateEvent(None,True,False,None) # pylint: disable=c-extension-no-member
+        self.thread=threading.Thread(target=self._run,daemon=True)
+        self.thread.start()
+
+    def _run(self)->None:
+        """
+        the watcher thread
+        """
+        import pywintypes
+        import win32con
+        import win32file
+        import win32event
+        import winerror
+        # pylint: disable=c-extension-no-member
+        buf=win32file.AllocateReadBuffer(self.BUFFER_SIZE)
+        overlapped=pywintypes.OVERLAPPED()
+        overlapped.hEvent=win32event.CreateEvent(None,False,False,None)
+        # filenames come back relative to source, so simply tack them on
+        # (os.path.join() would re-parse drive letters for every event)
+        sourcePrefix=self.source.rstrip(os.sep)+os.sep
+        try:
+            while True:
+                #
+                # ReadDirectoryChangesW takes a previously-created
+                # handle to a directory, a buffer for results,
+                # a flag to indicate whether to watch subtrees and
+                # a filter of what changes to notify.
+                #
+                win32file.ReadDirectoryChangesW (
+                    self._hDir,
+                    buf,
+                    True,
+                    win32con.FILE_NOTIFY_CHANGE_FILE_NAME |
+                        win32con.FILE_NOTIFY_CHANGE_DIR_NAME |
+                        win32con.FILE_NOTIFY_CHANGE_ATTRIBUTES |
+                        win32con.FILE_NOTIFY_CHANGE_SIZE |
+                        win32con.FILE_NOTIFY_CHANGE_LAST_WRITE |
+                        win32con.FILE_NOTIFY_CHANGE_SECURITY,
+                    overlapped
+                )
+                rc=win32event.WaitForMultipleObjects(
+                    [overlapped.hEvent,self._stopEvent],False,win32event.INFINITE)
+                if rc!=win32event.WAIT_OBJECT_0:
+                    # stop requested.  The read was issued by this
+                    # thread so CancelIo() is enough to abort it.
+                    win32file.CancelIo(self._hDir)
+                    # but buf and overlapped must not be freed until
+                    # the kernel is actually done with them
+                    try:
+                        win32file.GetOverlappedResult(self._hDir,overlapped,True)
+                    except pywintypes.error as e:
+                        if e.winerror!=winerror.ERROR_OPERATION_ABORTED:
+                            raise
+                    return
+                numBytes=win32file.GetOverlappedResult(self._hDir,overlapped,True)
+                if not numBytes:
+                    # buffer overflowed, so we don't know what changed
+                    self._notify(self.source,'UPDATE')
+                    continue
+                for action,filename in win32file.FILE_NOTIFY_INFORMATION(buf,numBytes):
+                    full_filename=sourcePrefix+filename
+                    self._notify(full_filename,self.ACTIONS.get(action,'UPDATE'))
+        finally:
+            self._hDir.Close()
+
+    def _notify(self,filename:str,action:str)->None:
+        """
+        call the watchFn without letting it throw
+        """
+        try:
+            self.watchFn(filename,action)
+        except Exception as e: # pylint: disable=broad-except
+            # cannot have this throw or it would prevent others executing
+            print(e)
+
+    def stop(self)->None:
+        """
+        stop watching
+        """
+        import win32event
+        win32event.SetEvent(self._stopEvent) # pylint: disable=c-extension-no-member
+
+
+class _PollingWatch:
+    """
+    Watches a single file or directory by periodically looking at it.
+
+    This is the last resort for when the os cannot tell us about changes.
+    """
+
+    def __init__(self,source:str,watchFn:ezFs.WatcherFn,
+        isDir:bool,pollingInterval:float):
+        self.source=source
+        self.watchFn=watchFn
+        self.isDir=isDir
+        self.pollingInterval=max(pollingInterval,MIN_POLLING_INTERVAL)
+        self._stopEvent=threading.Event()
+        self.thread=threading.Thread(target=self._run,daemon=True)
+        self.thread.start()
+
+    def _notify(self,filename:str,action:str)->None:
+        """
+        call the watchFn without letting it throw
+        """
+        try:
+            self.watchFn(filename,action)
+        except Exception as e: # pylint: disable=broad-except
+            # cannot have user-supplied function throw
+            print(e)
+
+    def _fingerprint(self)->typing.Optional[typing.Tuple[int,int,int]]:
+        """
+        get (st_mtime_ns,st_size,st_ino) for the file, or None if it is gone
+
+        All integers, so comparing them is exact.
+        """
+        try:
+            st=os.stat(self.source)
+        except OSError:
+            return None
+        return (st.st_mtime_ns,st.st_size,st.st_ino)
+
+    def _snapshot(self)->typing.Dict[str,int]:
+        """
+        get {name:st_mtime_ns} for everything in the directory
+
+        Uses a single scandir() pass and the stat that comes
+        along with each DirEntry.
+
+        :raises OSError: if the directory itself cannot be read
+        """
+        snapshot={}
+        with os.scandir(self.source) as entries:
+            for entry in entries:
+                try:
+                    snapshot[entry.name]=entry.stat(follow_symlinks=False).st_mtime_ns
+                except OSError:
+                    # deleted since scandir() saw it, so we'll pretend it was never there
+                    continue
+        return snapshot
+
+    def _run(self)->None:
+        """
+        the watcher thread
+        """
+        if not self.isDir:
+            lastchange=self._fingerprint()
+            while not self._stopEvent.wait(self.pollingInterval):
+                fingerprint=self._fingerprint()
+                if fingerprint!=lastchange:
+                    # NOTE: includes a new inode, as when an editor saves by
+                    # writing a new file and renaming it over the old one
+                    lastchange=fingerprint
+                    self._notify(self.source,'DELETE' if fingerprint is None else 'UPDATE')
+        else:
+            try:
+                before=self._snapshot()
+            except OSError:
+                self._notify(self.source,'DELETE')
+                return
+            while not self._stopEvent.wait(self.pollingInterval):
+                try:
+                    after=self._snapshot()
+                except OSError:
+                    self._notify(self.source,'DELETE')
+                    return
+                # dict views support set operations, so all the
+                # diffing happens in c rather than python loops
+                added=after.keys()-before.keys()
+                removed=before.keys()-after.keys()
+                updated={name for name,_ in after.items()-before.items()}-added
+                for name in added:
+                    self._notify(os.path.join(self.source,name),'CREATE')
+                for name in removed:
+                    self._notify(os.path.join(self.source,name),'DELETE')
+                for name in updated:
+                    self._notify(os.path.join(self.source,name),'UPDATE')
+                before=after
+
+    def stop(self)->None:
+        """
+        stop watching
+        """
+        self._stopEvent.set()
+
+
 class OsItem(ezFs.EzFsItem):
     """
     A single item on the os filesystem tree
@@ -19,6 +643,8 @@ class OsItem(ezFs.EzFsItem):
     def __init__(self,url:UrlCompatible,filesystem:"OsFs"):
         ezFs.EzFsItem.__init__(self,url,filesystem)
         self.canWatch:bool=True
+        self._stat:typing.Optional[os.stat_result]=None
+        self._dirEntry:typing.Optional[os.DirEntry]=None
 
     @property
     @abstractmethod
@@ -28,20 +654,33 @@ class OsItem(ezFs.EzFsItem):
         # needs at least one abstract method to treat the class
         # as abstract.
 
+    @property
+    def statResult(self)->os.stat_result:
+        """
+        the os.stat() of this item
+
+        This is cached, so only the first call goes to the disk.
+        """
+        if self._stat is None:
+            if self._dirEntry is not None:
+                # free on windows, where it came along with the listing
+                self._stat=self._dirEntry.stat()
+            else:
+                self._stat=self.filesystem._cachedStat(self.abspath) # pylint: disable=protected-access
+        return self._stat
+
     def removeWatch(self,
         watchFn:ezFs.WatcherFn
         )->None:
         """
         Quit watching an item for changes.
 
-        :param watchFn: _description_
+        If the same watchFn was added more than once, all of them are removed.
+
+        :param watchFn: the same function that was passed to addWatch()
         :type watchFn: ezFs.WatcherFn
-        :return: _description_
-        :rtype: _type_
         """
-        # TODO: implement removeWatch
-        _=watchFn
-        raise NotImplementedError()
+        self.filesystem._removeWatch(self.abspath,watchFn) # pylint: disable=protected-access
 
     def addWatch(self,watchFn:ezFs.WatcherFn,pollingInterval:float=30):
         """
@@ -51,113 +690,26 @@ class OsItem(ezFs.EzFsItem):
         This call returns immediately.
         The return value is a running thread or None if there was nothing to watch.
 
-        See also:
-            http://timgolden.me.uk/python/win32_how_do_i/watch_directory_for_changes.html
+        :param pollingInterval: seconds between checks, only used when the os
+            cannot notify us of changes and we must fall back to polling
+            (never less than MIN_POLLING_INTERVAL)
         """
         source=self.abspath
         if os.name=='nt': # windows
-            import win32con
-            import win32file
-            ACTIONS = {
-                1 : "CREATE",
-                2 : "DELETE",
-                3 : "UPDATE",
-                4 : "CREATE", # actually renamed in from somewhere else
-                5 : "RENAME"
-            }
-            FILE_LIST_DIRECTORY = 0x0001
-            hDir = win32file.CreateFile ( # pylint: disable=c-extension-no-member
-                source,
-                FILE_LIST_DIRECTORY,
-                win32con.FILE_SHARE_READ | win32con.FILE_SHARE_WRITE | win32con.FILE_SHARE_DELETE,
-                None,
-                win32con.OPEN_EXISTING,
-                win32con.FILE_FLAG_BACKUP_SEMANTICS,
-                None
-            )
-            while True:
-                #
-                # ReadDirectoryChangesW takes a previously-created
-                # handle to a directory, a buffer size for results,
-                # a flag to indicate whether to watch subtrees and
-                # a filter of what changes to notify.
-                #
-                # NB Tim Juchcinski reports that he needed to up
-                # the buffer size to be sure of picking up all
-                # events when a large number of files were
-                # deleted at once.
-                #
-                results = win32file.ReadDirectoryChangesW ( # pylint: disable=c-extension-no-member
-                    hDir,
-                    1024,
-                    True,
-                    win32con.FILE_NOTIFY_CHANGE_FILE_NAME |
-                        win32con.FILE_NOTIFY_CHANGE_DIR_NAME |
-                        win32con.FILE_NOTIFY_CHANGE_ATTRIBUTES |
-                        win32con.FILE_NOTIFY_CHANGE_SIZE |
-                        win32con.FILE_NOTIFY_CHANGE_LAST_WRITE |
-                        win32con.FILE_NOTIFY_CHANGE_SECURITY,
-                    None,
-                    None
-                )
-                for action,filename in results:
-                    full_filename=os.path.join(source,filename)
-                    try:
-                        watchFn(full_filename,ACTIONS[action])
-                    except Exception as e: # pylint: disable=broad-except
-                        # cannot have this throw or it would prevent others executing
-                        print(e)
-        elif os.name=='posix': # linux-like system
-            # TODO: Works for directory, not file
-            import time
-            import signal
-            def handler(signum,frame):
-                """
-                event handler for linux filesystem
-                """
-                _=signum,frame
-                watchFn(source,'UPDATE')
-            if hasattr(signal,'SIGIO'):
-                signal.signal(signal.SIGIO,handler)
-            else:
-                print('WARN: unable to import signal.SIGIO')
-            f=os.open(source,os.O_RDONLY)
-            try:
-                import fcntl
-                fcntl.fcntl(f,fcntl.F_SETSIG,0)
-                fcntl.fcntl(f,fcntl.F_NOTIFY,fcntl.DN_MODIFY|fcntl.DN_CREATE|fcntl.DN_MULTISHOT)
-            except ImportError:
-                print('WARN: unable to import fcntl')
-            while True:
-                time.sleep(pollingInterval*1000)
-        else: # in case all else fails, try polling on it
-            # poll using standard io (TODO: do as thread)
-            if not self.isDir:
-                lastchange=os.stat(source).st_mtime
-                while True:
-                    time.sleep(pollingInterval*1000)
-                    try:
-                        if os.stat(source).st_mtime!=lastchange:
-                            lastchange=os.stat(source).st_mtime
-                            watchFn(source,'UPDATE')
-                    except Exception as e: # pylint: disable=broad-except
-                        # cannot have user-supplied function throw
-                        print(e)
-                        watchFn(source,'DELETE')
-            else:
-                import time
-                before=dict([(f, None) for f in os.listdir(source)])
-                while True:
-                    time.sleep(pollingInterval*1000)
-                    after=dict([(f, None) for f in os.listdir(source)])
-                    added=[f for f in after if f not in before]
-                    removed=[f for f in before if f not in after]
-                    for filename in added:
-                        watchFn(source,'CREATE')
-                    if removed:
-                        watchFn(source,'REMOVE')
-                    #TODO: account for changes
-                    before=after
+            watch=_WindowsWatch(source,watchFn)
+            self.filesystem._rememberWatch(source,watchFn,watch) # pylint: disable=protected-access
+            return watch.thread
+        if os.name=='posix': # linux-like system
+            # NOTE: problems with source itself (eg, it doesn't exist) are raised
+            watch=self.filesystem._addInotifyWatch(source,watchFn) # pylint: disable=protected-access
+            if watch is not None:
+                self.filesystem._rememberWatch(source,watchFn,watch) # pylint: disable=protected-access
+                return self.filesystem._watcherThread # pylint: disable=protected-access
+            # no inotify (eg, not linux), so fall back to polling
+        # in case all else fails, try polling on it
+        watch=_PollingWatch(source,watchFn,self.isDir,pollingInterval)
+        self.filesystem._rememberWatch(source,watchFn,watch) # pylint: disable=protected-access
+        return watch.thread
 
 
 class OsFile(ezFs.EzFsFile,OsItem):
@@ -171,6 +723,7 @@ class OsFile(ezFs.EzFsFile,OsItem):
         ezFs.EzFsFile.__init__(self,url,filesystem)
         OsItem.__init__(self,url,filesystem)
         self._f:typing.Optional[typing.IO]=None
+        self._finalizer:typing.Optional[weakref.finalize]=None
 
     def open(self,fileAccessMode:typing.Optional[str]=None)->"OsFile":
         """
@@ -184,17 +737,31 @@ class OsFile(ezFs.EzFsFile,OsItem):
                 raise Exception("Null file location")
             self.isOpen=True
             if fileAccessMode is None:
-                fileAccessMode=self._fileAccessMode
+                fileAccessMode=self._fileAccessMode or 'rb'
             else:
                 self._fileAccessMode:str=fileAccessMode
-            self._f=open(self.url.filePath,fileAccessMode,encoding='utf-8')
+            if 'b' in fileAccessMode:
+                # binary.  read() will decode if asked to.
+                self._f=open(self.url.filePath,fileAccessMode,
+                    buffering=FILE_BUFFER_SIZE)
+            else:
+                self._f=open(self.url.filePath,fileAccessMode,
+                    buffering=FILE_BUFFER_SIZE,encoding='utf-8')
+            # make sure the file gets closed if we are garbage collected
+            self._finalizer=weakref.finalize(self,self._f.close)
         else:
             self.seek(0)
         return self
 
-    def __del__(self)->None:
+    def __enter__(self)->"OsFile":
+        """
+        use as a context manager, so the file is closed on exit
+        """
+        return self
+
+    def __exit__(self,*args)->None:
         """
-        Attempt to auto-close when object is deleted
+        close the file at the end of a with block
         """
         self.close()
 
@@ -226,7 +793,7 @@ class OsFile(ezFs.EzFsFile,OsItem):
         read n# of bytes, or the whole thing
         """
         if self._f is None:
-            self._f=self.open('rb')
+            self.open('rb')
         data=self._f.read(numBytes)
         if encoding is not None:
             data=data.decode(encoding)
@@ -238,11 +805,100 @@ class OsFile(ezFs.EzFsFile,OsItem):
         """
         if self._f is None:
             self.open('wb')
-        if not isinstance(data,bytes):
-            if not isinstance(data,str):
-                data=str(data)
-            data=data.encode(encoding)
-        return self._f.write(data)  # type: ignore
+        if isinstance(data,(bytes,bytearray,memoryview)):
+            size=data.nbytes if isinstance(data,memoryview) else len(data)
+            if size>FILE_BUFFER_SIZE and 'b' in self._f.mode: # type: ignore
+                return self._writeDirect(data)
+            return self._f.write(data)  # type: ignore
+        if not isinstance(data,str):
+            data=str(data)
+        if 'b' not in self._f.mode: # type: ignore
+            # text mode, so the file does its own encoding
+            return self._f.write(data)  # type: ignore
+        return self._f.write(data.encode(encoding))  # type: ignore
+
+    def _writeDirect(self,data:typing.Union[bytes,bytearray,memoryview])->int:
+        """
+        Write a large buffer straight to the os, skipping
+        the copy into python's buffered writer
+        """
+        self._f.flush() # type: ignore
+        fd=self._f.fileno() # type: ignore
+        view=memoryview(data).cast('B')
+        written=0
+        while written<len(view):
+            written+=os.write(fd,view[written:])
+        return written
+
+    def copyTo(self,other:"OsFile")->None:
+        """
+        Copy the contents of this file over the top of another file
+
+        Between two files on linux, this is done with os.sendfile() so the
+        data never leaves the kernel.  Otherwise it is copied through
+        a separate read handle.  Either way, other ends up holding
+        exactly the contents of this file, written out to disk.
+        If other was already open it is left open (and flushed),
+        otherwise it is left closed.
+
+        :raises shutil.SameFileError: if both are the same file
+        """
+        try:
+            sameFile=os.path.samefile(self.abspath,other.abspath)
+        except OSError: # other doesn't exist yet
+            sameFile=False
+        if sameFile:
+            raise shutil.SameFileError(
+                f'"{self.abspath}" and "{other.abspath}" are the same file')
+        if self._f is not None:
+            self.flush()
+        self.filesystem._invalidateStat(other.abspath) # pylint: disable=protected-access
+        if other._f is None and sys.platform.startswith('linux') \
+            and self._sendfile(other.abspath):
+            return
+        openedOther=other._f is None
+        if openedOther:
+            other.open('wb')
+        else:
+            other.seek(0)
+            other._f.truncate()
+        dst=other._f
+        if 'b' not in dst.mode: # type: ignore
+            dst.flush() # type: ignore
+            dst=dst.buffer # type: ignore
+        # our own handle, since self._f may be in the wrong mode or position
+        with open(self.abspath,'rb',buffering=0) as src:
+            shutil.copyfileobj(src,dst,FILE_BUFFER_SIZE) # type: ignore
+        if openedOther:
+            other.close()
+        else:
+            dst.flush() # type: ignore
+
+    def _sendfile(self,dstPath:str)->bool:
+        """
+        Copy this file to dstPath with os.sendfile()
+
+        :return: False if the kernel refused and nothing was copied
+        """
+        src=os.open(self.abspath,os.O_RDONLY)
+        try:
+            dst=os.open(dstPath,os.O_WRONLY|os.O_CREAT|os.O_TRUNC,0o666)
+            try:
+                offset=0
+                while True:
+                    try:
+                        sent=os.sendfile(dst,src,offset,FILE_BUFFER_SIZE)
+                    except OSError as e:
+                        if offset==0 and e.errno in (errno.EINVAL,errno.ENOSYS):
+                            return False
+                        raise
+                    if sent==0:
+                        return True
+                    offset+=sent
+            finally:
+                os.close(dst)
+        finally:
+            os.close(src)
 
     def close(self)->None:
         """
@@ -251,6 +907,9 @@ class OsFile(ezFs.EzFsFile,OsItem):
         if self._f is not None:
             self.isOpen=False
             self.fileAccessMode=''
+            if self._finalizer is not None:
+                self._finalizer.detach()
+                self._finalizer=None
             self._f.close()
             self._f=None
 
@@ -271,22 +930,81 @@ class OsDirectory(ezFs.EzFsDirectory,OsItem):
     def __init__(self,url:UrlCompatible,filesystem:"OsFs"):
         ezFs.EzFsDirectory.__init__(self,url,filesystem)
         OsItem.__init__(self,url,filesystem)
-        self._children:typing.Optional[OsItem]=None
+        self._children:typing.Optional[typing.List[typing.List[OsItem]]]=None
+        self._dirtyCount=0 # so a listing in progress can tell it went stale
 
     def markDirty(self)->None:
         """
         mark the underlying dataset as having changed
         """
         self._children=None
+        self._dirtyCount+=1
+        self._stat=None
+        self._dirEntry=None
+        self.filesystem._statCache.clear() # pylint: disable=protected-access
 
     @property
     def children(self)->typing.Iterable[OsItem]:
         """
         get all of the files in this directory
+
+        The directory is read lazily, a batch at a time.  Once it has
+        been read all the way through it is kept, so iterating again
+        does not go back to the disk.
+        """
+        if self._children is not None:
+            return itertools.chain.from_iterable(self._children)
+        return self._readChildren()
+
+    def _readChildren(self)->typing.Generator[OsItem,None,None]:
+        """
+        read the children, keeping them if we get all the way through
+
+        NOTE: the open directory belongs to this generator, not to self,
+        so stopping early closes it rather than leaving it open
+        """
+        dirtyCount=self._dirtyCount
+        batches=[]
+        for batch in self.filesystem._dirBatched(self): # pylint: disable=protected-access
+            batches.append(batch)
+            yield from batch
+        if dirtyCount==self._dirtyCount:
+            self._children=batches
+
+    def childrenStats(self)->typing.List[typing.Tuple[str,os.stat_result]]:
+        """
+        get (name,os.stat_result) for everything in this directory, in one pass
+
+        This is for when you need more than just the names, and saves
+        looking up each child separately.  (On windows the stats come
+        along with the directory listing for free.)
+
+        The stats do not follow symlinks.  Anything that cannot be
+        stat'ed (eg, it was deleted mid-listing) is left out.
+        """
+        now=time.monotonic()
+        ret=[]
+        with os.scandir(self.abspath) as entries:
+            for entry in entries:
+                try:
+                    st=entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                if not stat.S_ISLNK(st.st_mode):
+                    # same as a regular stat, so share it
+                    self.filesystem._storeStat(entry.path,st,now) # pylint: disable=protected-access
+                ret.append((entry.name,st))
+        return ret
+
+    def childrenBatched(self,
+        batchSize:int=DIR_BATCH_SIZE
+        )->typing.Iterator[typing.List[OsItem]]:
         """
-        if self._children is None:
-            self._children=self.filesystem._dir(self) # pylint: disable=protected-access
-        return self._children
+        get all of the files in this directory as lists of up to batchSize items
+
+        Unlike children, this always reads the directory afresh.
+        """
+        return self.filesystem._dirBatched(self,batchSize) # pylint: disable=protected-access
 
     def mount(self,
         location: UrlCompatible,
@@ -302,9 +1020,15 @@ class OsFs(ezFs.EzFsFilesystem,OsDirectory):
     The current OS's (disk) filesystem
     """
 
-    URL_PROTOCOLS=['file://','',None]
+    URL_PROTOCOLS=frozenset(['file://','',None])
 
-    def __init__(self,url:UrlCompatible=None,defaultLocationCwd:bool=True):
+    def __init__(self,
+        url:UrlCompatible=None,
+        defaultLocationCwd:bool=True,
+        statCacheTtl:float=1.0):
+        """
+        :param statCacheTtl: how many seconds to trust a cached os.stat() for
+        """
         caseSensitive=(os.sep!='\\')
         if url is None or (isinstance(url,str) and not url): # if None or empty string
             if defaultLocationCwd:
@@ -316,13 +1040,224 @@ class OsFs(ezFs.EzFsFilesystem,OsDirectory):
                     url=asUrl('/')
         else:
             url=asUrl(url)
+        self._statCache:typing.Dict[str,typing.Tuple[float,os.stat_result]]={}
+        self._statCacheTtl=statCacheTtl
         ezFs.EzFsFilesystem.__init__(self,url,caseSensitive)
         OsDirectory.__init__(self,url,self)
+        self._watches:typing.Dict[typing.Tuple[str,ezFs.WatcherFn],typing.List[typing.Any]]={}
+        self._watcherLock=threading.Lock()
+        self._selector:typing.Optional[selectors.BaseSelector]=None
+        self._watcherThread:typing.Optional[threading.Thread]=None
+        self._wakeFds:typing.Optional[typing.Tuple[int,int]]=None
+        self._toRelease:typing.List[typing.Any]=[]
+        self._stopWatcher=False
+        self._inotify:typing.Optional[_Inotify]=None
 
-    @property
-    def root(self):
-        d=OsDirectory('file://',self)
-        return d
+    def _getSelector(self)->selectors.BaseSelector:
+        """
+        get the selector that all the watches share,
+        starting the watcher thread the first time
+
+        The caller must hold _watcherLock.
+        """
+        if self._selector is None:
+            self._selector=selectors.DefaultSelector()
+            # a pipe to wake the thread up when there is something for it to do
+            self._wakeFds=os.pipe()
+            for fd in self._wakeFds:
+                os.set_blocking(fd,False)
+            self._selector.register(self._wakeFds[0],selectors.EVENT_READ,None)
+            self._stopWatcher=False
+            self._watcherThread=threading.Thread(
+                target=self._watcherLoop,args=(self._selector,self._wakeFds),daemon=True)
+            self._watcherThread.start()
+        return self._selector
+
+    def _wakeWatcher(self)->None:
+        """
+        wake the watcher thread up
+
+        The caller must hold _watcherLock.
+        """
+        if self._wakeFds is not None:
+            try:
+                os.write(self._wakeFds[1],b'\0')
+            except BlockingIOError:
+                pass # the pipe is full, so it's awake anyway
+
+    def _releaseOnWatcher(self,watched:typing.Any)->None:
+        """
+        unregister something from the selector and close() it
+
+        That is done by the watcher thread itself, so it can't
+        happen while it's in the middle of a dispatch()
+        """
+        with self._watcherLock:
+            if self._selector is None:
+                return # the thread is gone and closed everything already
+            self._toRelease.append(watched)
+            self._wakeWatcher()
+
+    def _watcherLoop(self,
+        selector:selectors.BaseSelector,
+        wakeFds:typing.Tuple[int,int]
+        )->None:
+        """
+        the one thread that waits on everything being watched
+
+        Stops once nothing is registered, or close() is called.
+        """
+        while True:
+            for key,_ in selector.select():
+                if key.data is None: # woken up
+                    try:
+                        while os.read(wakeFds[0],4096):
+                            pass
+                    except BlockingIOError:
+                        pass
+                    continue
+                try:
+                    key.data.dispatch()
+                except Exception as e: # pylint: disable=broad-except
+                    # keep going, or every other watch would die too
+                    print(e)
+            with self._watcherLock:
+                toRelease,self._toRelease=self._toRelease,[]
+            for watched in toRelease:
+                try:
+                    selector.unregister(watched)
+                except KeyError:
+                    continue # already released
+                watched.close()
+            with self._watcherLock:
+                if self._toRelease:
+                    continue
+                if not self._stopWatcher and len(selector.get_map())>1:
+                    continue # still watching something besides the wake pipe
+                # anything added from now on gets a new thread
+                self._selector=None
+                self._watcherThread=None
+                self._wakeFds=None
+                self._inotify=None # if it's still registered it's closed below
+                break
+        for key in list(selector.get_map().values()):
+            if key.data is not None:
+                key.data.close()
+        selector.close()
+        for fd in wakeFds:
+            os.close(fd)
+
+    def _rememberWatch(self,source:str,watchFn:ezFs.WatcherFn,watch:typing.Any)->None:
+        """
+        keep track of a watch so removeWatch() can find it
+        """
+        with self._watcherLock:
+            self._watches.setdefault((source,watchFn),[]).append(watch)
+
+    def _removeWatch(self,source:str,watchFn:ezFs.WatcherFn)->None:
+        """
+        stop all the watches of source by watchFn
+
+        If that leaves inotify with nothing to watch, it is closed, and
+        once nothing at all is being watched the watcher thread stops.
+        """
+        with self._watcherLock:
+            watches=self._watches.pop((source,watchFn),())
+        for watch in watches:
+            watch.stop()
+        with self._watcherLock:
+            if self._inotify is not None and self._inotify.isIdle:
+                inotify,self._inotify=self._inotify,None
+            else:
+                return
+        self._releaseOnWatcher(inotify)
+
+    def close(self)->None:
+        """
+        stop every watch, and the watcher thread
+        """
+        with self._watcherLock:
+            watches=list(itertools.chain.from_iterable(self._watches.values()))
+            self._watches.clear()
+        for watch in watches:
+            watch.stop()
+        with self._watcherLock:
+            thread=self._watcherThread
+            if thread is None:
+                return
+            self._stopWatcher=True
+            self._wakeWatcher()
+        if thread is not threading.current_thread():
+            thread.join()
+
+    def _addInotifyWatch(self,
+        source:str,
+        watchFn:ezFs.WatcherFn
+        )->typing.Optional[_InotifyWatch]:
+        """
+        watch a file or directory with the shared inotify instance
+
+        :return: None if inotify is not available here
+        :raises OSError: if source cannot be watched (eg, it doesn't exist)
+        """
+        with self._watcherLock:
+            if self._inotify is None:
+                try:
+                    inotify=_Inotify()
+                except AttributeError: # this libc has no inotify
+                    return None
+                except OSError as e:
+                    if e.errno in (errno.ENOSYS,errno.EMFILE):
+                        print(f'WARN: unable to use inotify ({e})')
+                        return None
+                    raise
+                self._getSelector().register(inotify,selectors.EVENT_READ,inotify)
+                self._inotify=inotify
+            # NOTE: inside the lock, so _removeWatch() can't see it idle and close it
+            return self._inotify.add(source,watchFn)
+
+    def watchMount(self,mountpath:str,watchFn:ezFs.WatcherFn):
+        """
+        When anything at or below the mount point mountpath changes,
+        will call a watchFn(file,operation)
+        where operation can be one of "CREATE,UPDATE,DELETE,RENAME"
+
+        Unlike addWatch() this covers every subdirectory with a single
+        (linux fanotify) watch.  That needs CAP_SYS_ADMIN and linux 5.1+,
+        otherwise it falls back to an ordinary addWatch() on mountpath.
+        For creates, deletes, and renames, the file reported is the
+        directory where it happened.
+
+        This call returns immediately.
+        Stop watching with removeWatch() on mountpath.
+        The return value is a running thread or None if there was nothing to watch.
+
+        :raises ValueError: if mountpath is not a mount point
+        """
+        mountpath=os.path.abspath(mountpath)
+        if not os.path.ismount(mountpath):
+            raise ValueError(f'"{mountpath}" is not a mount point')
+        if not sys.platform.startswith('linux'):
+            return self._getFsItem(mountpath).addWatch(watchFn)
+        try:
+            watch=_FanotifyWatch(mountpath,watchFn)
+        except (OSError,AttributeError) as e:
+            print(f'WARN: unable to use fanotify ({e})')
+            return self._getFsItem(mountpath).addWatch(watchFn)
+        with self._watcherLock:
+            self._getSelector().register(watch,selectors.EVENT_READ,watch)
+            watch.filesystem=self
+        self._rememberWatch(mountpath,watchFn,watch)
+        return self._watcherThread
+
+    @functools.cached_property
+    def root(self)->OsDirectory:
+        """
+        the root directory of this filesystem
+
+        This never changes, so it is only created once.
+        """
+        return OsDirectory('file://',self)
 
     def _getFsItem(self,url:UrlCompatible)->OsItem:
         """
@@ -332,14 +1267,75 @@ class OsFs(ezFs.EzFsFilesystem,OsDirectory):
         path=url.filePath
         if not path:
             path=os.curdir
-        if os.path.isdir(path):
+        try:
+            st=self._cachedStat(path)
+        except OSError:
+            raise ezFs.NoFileException(path) # pylint: disable=raise-missing-from
+        item:OsItem
+        if stat.S_ISDIR(st.st_mode):
             item=OsDirectory(url,self)
-        elif os.path.exists(path):
+        else:
             item=OsFile(url,self)
+        item._stat=st # pylint: disable=protected-access
+        return item
+
+    def _getFsItemFromDirEntry(self,entry:os.DirEntry,url:URL)->OsItem:
+        """
+        get a single item from a directory listing entry
+
+        The entry already knows whether it is a directory,
+        so this does not need to go back to the disk.
+        """
+        item:OsItem
+        if entry.is_dir():
+            item=OsDirectory(url,self)
         else:
-            raise ezFs.NoFileException(path)
+            item=OsFile(url,self)
+        item._dirEntry=entry # pylint: disable=protected-access
         return item
 
+    def _cachedStat(self,path:str)->os.stat_result:
+        """
+        os.stat() a path, reusing the answer for up to statCacheTtl seconds
+
+        :raises OSError: if the path cannot be stat'ed
+        """
+        # NOTE: normalized, so eg "a/../b" and "b" share an entry
+        path=os.path.abspath(path)
+        now=time.monotonic()
+        cached=self._statCache.get(path)
+        if cached is not None and now-cached[0]<self._statCacheTtl:
+            return cached[1]
+        st=os.stat(path)
+        self._storeStat(path,st,now)
+        return st
+
+    def _storeStat(self,path:str,st:os.stat_result,now:float)->None:
+        """
+        add a stat to the cache, first throwing out expired ones if it's getting big
+        """
+        if len(self._statCache)>=STAT_CACHE_PURGE_SIZE:
+            self._statCache={k:v for k,v in self._statCache.items()
+                if now-v[0]<self._statCacheTtl}
+        self._statCache[path]=(now,st)
+
+    def _cachedFileType(self,path:str)->int:
+        """
+        get the file type bits (stat.S_IFMT) of a path, or 0 if it does not exist
+        """
+        try:
+            return stat.S_IFMT(self._cachedStat(path).st_mode)
+        except OSError:
+            return 0
+
+    def _invalidateStat(self,path:str)->None:
+        """
+        forget the cached stat for a path and its parent directory
+        """
+        path=os.path.abspath(path)
+        self._statCache.pop(path,None)
+        self._statCache.pop(os.path.dirname(path),None)
+
     def read(self,
         locationString:UrlCompatible,
         justOne:bool=True,
@@ -350,38 +1346,90 @@ class OsFs(ezFs.EzFsFilesystem,OsDirectory):
         """
         if locationString.startswith('file://'):
             locationString=locationString[7:]
-            split=locationString.split('/')
-            sysLocation=os.sep.join(split)
+            sysLocation=locationString.translate(_URL_TO_OS)
         else:
-            split=locationString.split(os.sep)
             sysLocation=locationString
         if locationString in ('_','stdin'):
             return None # TODO: need to pass this up into the formats bin and
             #           read whatever is on standard input
-        if os.path.isfile(sysLocation):
+        fileType=self._cachedFileType(sysLocation)
+        if stat.S_ISREG(fileType):
             return None # TODO: need to pass this up into the formats bin to read
-        if os.path.isdir(sysLocation):
+        if stat.S_ISDIR(fileType):
             return None # TODO: read all the files in this directory... and possibly subdirectories
+        split=sysLocation.split(os.sep)
         currentPath=split[0]
         for level in split[1:]:
-            if os.path.isdir(currentPath):
+            fileType=self._cachedFileType(currentPath)
+            if stat.S_ISDIR(fileType):
                 # this is a directory, so go into it
                 currentPath=currentPath+os.sep+level
-            elif os.path.isfile(currentPath):
+            elif stat.S_ISREG(fileType):
                 # this is a file... possibly with more stuff in it
                 return None # TODO: need to pass this up into the formats bin to read.
                 #         If there is anything left in split[] then we need to pass that in as well!
             else:
                 # This isn't an actual location.  Is it a glob?
-                import glob
                 foundAny=False
-                for filename in glob.glob(currentPath):
+                for filename in self._glob(currentPath):
                     foundAny=True
                     # TODO: read all these files... and possibly subdirectories
                 if not foundAny:
                     print(f'File "{locationString}" not found.  ("{currentPath}") does not exist.')
+                return None
         return None
 
+    def _glob(self,pattern:str)->typing.Generator[str,None,None]:
+        """
+        find all existing paths that match a wildcard pattern (like glob.glob)
+
+        Each wildcard segment is compiled to a regex once, and every
+        directory along the way is read with a single os.scandir().
+        """
+        if not pattern:
+            return
+        # either separator is allowed, like glob
+        segments=pattern.translate(_URL_TO_OS).split(os.sep)
+        if _GLOB_MAGIC.search(segments[0]):
+            base=''
+        else:
+            base=segments.pop(0)+os.sep
+        segments=[seg for seg in segments if seg]
+        matchers=[_compileGlobSegment(seg) if _GLOB_MAGIC.search(seg) else None
+            for seg in segments]
+        def join(path:str,name:str)->str:
+            if not path or path.endswith(os.sep):
+                return path+name
+            return path+os.sep+name
+        paths=[base]
+        lastIndex=len(segments)-1
+        for i,(seg,match) in enumerate(zip(segments,matchers)):
+            if match is None:
+                # literal name.  If it doesn't exist, the next scandir will say so.
+                paths=[join(path,seg) for path in paths]
+                continue
+            matched=[]
+            for path in paths:
+                try:
+                    with os.scandir(path or os.curdir) as entries:
+                        for entry in entries:
+                            if entry.name[0]=='.' and seg[0]!='.':
+                                continue # like glob, wildcards don't match hidden files
+                            if not match(entry.name):
+                                continue
+                            if i<lastIndex and not entry.is_dir():
+                                continue
+                            matched.append(join(path,entry.name))
+                except OSError:
+                    pass
+            paths=matched
+        if matchers and matchers[-1] is not None:
+            yield from paths
+        else:
+            for path in paths:
+                if self._cachedFileType(path):
+                    yield path
+
     def _isRootPath(self,path:str)->bool:
         if path and path[0]=='/':
             # linux style
@@ -391,18 +1439,30 @@ class OsFs(ezFs.EzFsFilesystem,OsDirectory):
             return True
         return False
 
-    def _dir(self,url:UrlCompatible)->typing.Generator[OsItem,None,None]:
+    def _dir(self,url:UrlCompatible)->typing.Iterator[OsItem]:
         """
         get a directory listing
         """
+        return itertools.chain.from_iterable(self._dirBatched(url))
+
+    def _dirBatched(self,
+        url:UrlCompatible,
+        batchSize:int=DIR_BATCH_SIZE
+        )->typing.Generator[typing.List[OsItem],None,None]:
+        """
+        get a directory listing as lists of up to batchSize items
+        """
         url=asUrl(url)
         path=url.filePath
         if not path:
             path='.'
-        for c in os.listdir(path):
-            itemUrl=url.child(c)
-            item=self._getFsItem(itemUrl)
-            yield item
+        with os.scandir(path) as entries:
+            while True:
+                batch=list(itertools.islice(entries,batchSize))
+                if not batch:
+                    return
+                yield [self._getFsItemFromDirEntry(entry,url.child(entry.name))
+                    for entry in batch]
 
     def _delete(self,fsItem:OsItem)->None:
         """
@@ -413,6 +1473,7 @@ class OsFs(ezFs.EzFsFilesystem,OsDirectory):
             shutil.rmtree(fsItem.fsId)
         else:
             os.remove(fsItem.fsId)
+        self._invalidateStat(fsItem.abspath)
         fsItem.parent.markDirty()
 
     def _rename(self,fsItem:OsItem,newName:str)->None:
@@ -429,6 +1490,8 @@ class OsFs(ezFs.EzFsFilesystem,OsDirectory):
         except Exception as e:
             print('ERR: Renaming "'+oldPath+'" to "'+newPath+'"')
             raise e
+        self._invalidateStat(fsItem.abspath)
+        self._invalidateStat(asUrl(newPath).filePath)
         if isinstance(fsItem,ezFs.EzFsItem):
             fsItem.url=newName
 
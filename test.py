@@ -9,7 +9,12 @@ See:
 import typing
 import unittest
 import os
+import glob
+import shutil
+import tempfile
+import time
 from osFs import OsFilesystem
+import osFs._osFs as _osFs
 
 
 __HERE__=os.path.abspath(__file__).rsplit(os.sep,1)[0]+os.sep
@@ -21,10 +26,20 @@ class Test(unittest.TestCase):
     """
 
     def setUp(self):
-        pass
-        
+        self.tmp=tempfile.mkdtemp()
+
     def tearDown(self):
-        pass
+        shutil.rmtree(self.tmp,ignore_errors=True)
+
+    def _touch(self,*names:str,data:bytes=b'')->None:
+        """
+        create files (and their directories) under self.tmp
+        """
+        for name in names:
+            filename=os.path.join(self.tmp,*name.split('/'))
+            os.makedirs(os.path.dirname(filename),exist_ok=True)
+            with open(filename,'wb') as f:
+                f.write(data)
         
     def basic(self):
         testdir=__HERE__+'test'+os.sep+'basic'
@@ -34,6 +49,257 @@ class Test(unittest.TestCase):
         for item in d.ls:
             print(item)
 
+    def testGlob(self):
+        """
+        _glob() should find exactly what glob.glob() does
+        """
+        self._touch('a/x.txt','a/y.py','b/x.txt','b/.hidden.txt','c.txt','.top')
+        fs=OsFilesystem(self.tmp)
+        for pattern in ('*/x.txt','*/*.txt','?.txt','*','.*','*/.*',
+            'a/y.py','a/nothere.py','[ab]/*.py','nothere/*','*/nothere','*.nothing'):
+            pattern=os.path.join(self.tmp,*pattern.split('/'))
+            self.assertEqual(sorted(fs._glob(pattern)),sorted(glob.glob(pattern)),pattern) # pylint: disable=protected-access
+        self.assertEqual(list(fs._glob('')),[]) # pylint: disable=protected-access
+        # forward slashes work as a separator everywhere
+        self.assertEqual(sorted(fs._glob(self.tmp+'/*/x.txt')), # pylint: disable=protected-access
+            sorted(glob.glob(os.path.join(self.tmp,'*','x.txt'))))
+
+    def testChildren(self):
+        """
+        children can be iterated more than once, and stopping early doesn't cache
+        """
+        names=[f'f{i}' for i in range(_osFs.DIR_BATCH_SIZE*2+5)]
+        self._touch(*names)
+        d=OsFilesystem(self.tmp)
+        next(iter(d.children))
+        self.assertIsNone(d._children) # pylint: disable=protected-access
+        first=sorted(item.abspath for item in d.children)
+        second=sorted(item.abspath for item in d.children)
+        self.assertEqual(first,sorted(os.path.join(self.tmp,n) for n in names))
+        self.assertEqual(first,second)
+
+    def testChildrenStats(self):
+        """
+        childrenStats() matches os.lstat(), and shares them with the stat cache
+        without letting it grow forever
+        """
+        names=[f'f{i}' for i in range(20)]
+        self._touch(*names,data=b'12345')
+        os.symlink('missing',os.path.join(self.tmp,'link'))
+        d=OsFilesystem(self.tmp)
+        stats=dict(d.childrenStats())
+        self.assertEqual(sorted(stats),sorted(names+['link']))
+        self.assertEqual(stats['f0'].st_size,5)
+        self.assertEqual(stats['link'],os.lstat(os.path.join(self.tmp,'link')))
+        statCache=d._statCache # pylint: disable=protected-access
+        self.assertIn(os.path.join(self.tmp,'f0'),statCache)
+        self.assertNotIn(os.path.join(self.tmp,'link'),statCache)
+        oldPurgeSize=_osFs.STAT_CACHE_PURGE_SIZE
+        _osFs.STAT_CACHE_PURGE_SIZE=5
+        try:
+            d=OsFilesystem(self.tmp,statCacheTtl=0)
+            d.childrenStats()
+            self.assertLessEqual(len(d._statCache),5) # pylint: disable=protected-access
+        finally:
+            _osFs.STAT_CACHE_PURGE_SIZE=oldPurgeSize
+
+    def testGetFsItem(self):
+        """
+        get() picks the right type from a single stat, which the item keeps
+        """
+        self._touch('d/f',data=b'12345')
+        fs=OsFilesystem(self.tmp)
+        f=fs.get(os.path.join(self.tmp,'d','f'))
+        self.assertIsInstance(f,_osFs.OsFile)
+        self.assertIsNotNone(f._stat) # pylint: disable=protected-access
+        self.assertEqual(f.statResult.st_size,5)
+        self.assertIsInstance(fs.get(os.path.join(self.tmp,'d')),_osFs.OsDirectory)
+        with self.assertRaises(_osFs.ezFs.NoFileException):
+            fs.get(os.path.join(self.tmp,'missing'))
+
+    def testStatCache(self):
+        """
+        stats are reused until they expire or are invalidated,
+        however the path is spelled
+        """
+        self._touch('f',data=b'old')
+        filename=os.path.join(self.tmp,'f')
+        fs=OsFilesystem(self.tmp,statCacheTtl=60)
+        self.assertEqual(fs._cachedStat(filename).st_size,3) # pylint: disable=protected-access
+        self._touch('f',data=b'longer')
+        unnormalized=os.path.join(self.tmp,'sub','..','f')
+        self.assertEqual(fs._cachedStat(unnormalized).st_size,3) # pylint: disable=protected-access
+        fs._invalidateStat(unnormalized) # pylint: disable=protected-access
+        self.assertEqual(fs._cachedStat(filename).st_size,6) # pylint: disable=protected-access
+        fs=OsFilesystem(self.tmp,statCacheTtl=0)
+        fs._cachedStat(filename) # pylint: disable=protected-access
+        self._touch('f')
+        self.assertEqual(fs._cachedStat(filename).st_size,0) # pylint: disable=protected-access
+
+    def testWrite(self):
+        """
+        write() takes str, bytes-likes, and anything else, in either mode
+        """
+        self._touch('f')
+        filename=os.path.join(self.tmp,'f')
+        f=OsFilesystem(self.tmp).get(filename)
+        f.open('wb')
+        f.write('hé')
+        f.write(b'b')
+        f.write(bytearray(b'ba'))
+        f.write(memoryview(b'mv'))
+        f.write(12)
+        big=os.urandom(_osFs.FILE_BUFFER_SIZE+123) # takes the direct path
+        self.assertEqual(f.write(memoryview(big)),len(big))
+        f.write(b'end')
+        f.close()
+        with open(filename,'rb') as check:
+            self.assertEqual(check.read(),'hé'.encode('utf-8')+b'bbamv12'+big+b'end')
+        f.open('w')
+        f.write('text')
+        f.write(3)
+        f.close()
+        with open(filename,'rb') as check:
+            self.assertEqual(check.read(),b'text3')
+
+    def testCopyTo(self):
+        """
+        copyTo() replaces the destination, and refuses to copy onto itself
+        """
+        self._touch('src',data=b'source data')
+        self._touch('dst',data=b'much longer destination data')
+        fs=OsFilesystem(self.tmp)
+        src=fs.get(os.path.join(self.tmp,'src'))
+        dst=fs.get(os.path.join(self.tmp,'dst'))
+        src.copyTo(dst)
+        with open(os.path.join(self.tmp,'dst'),'rb') as check:
+            self.assertEqual(check.read(),b'source data')
+        with self.assertRaises(shutil.SameFileError):
+            src.copyTo(fs.get(os.path.join(self.tmp,'src')))
+        with open(os.path.join(self.tmp,'src'),'rb') as check:
+            self.assertEqual(check.read(),b'source data')
+        # source open for writing and destination already open
+        src.open('wb')
+        src.write(b'new')
+        dst.open('ab')
+        src.copyTo(dst)
+        src.close()
+        with open(os.path.join(self.tmp,'dst'),'rb') as check:
+            self.assertEqual(check.read(),b'new')
+        dst.close()
+        # without sendfile, a destination copyTo() opened itself is closed again
+        src._sendfile=lambda dstPath:False # pylint: disable=protected-access
+        self._touch('src',data=b'fallback data')
+        src.copyTo(dst)
+        self.assertIsNone(dst._f) # pylint: disable=protected-access
+        with open(os.path.join(self.tmp,'dst'),'rb') as check:
+            self.assertEqual(check.read(),b'fallback data')
+
+    def testPollingWatch(self):
+        """
+        the polling fallback reports creates and deletes of children
+        """
+        self._touch('old')
+        events=[]
+        oldInterval=_osFs.MIN_POLLING_INTERVAL
+        _osFs.MIN_POLLING_INTERVAL=0.05
+        try:
+            watch=_osFs._PollingWatch(self.tmp, # pylint: disable=protected-access
+                lambda filename,action:events.append((filename,action)),True,0.05)
+            time.sleep(0.1)
+            self._touch('new')
+            os.remove(os.path.join(self.tmp,'old'))
+            time.sleep(0.3)
+            watch.stop()
+            watch.thread.join(1)
+        finally:
+            _osFs.MIN_POLLING_INTERVAL=oldInterval
+        self.assertFalse(watch.thread.is_alive())
+        self.assertIn((os.path.join(self.tmp,'new'),'CREATE'),events)
+        self.assertIn((os.path.join(self.tmp,'old'),'DELETE'),events)
+        # watching something that isn't there reports it gone, rather than crashing
+        events.clear()
+        missing=os.path.join(self.tmp,'missing')
+        watch=_osFs._PollingWatch(missing, # pylint: disable=protected-access
+            lambda filename,action:events.append((filename,action)),True,0.05)
+        watch.thread.join(1)
+        self.assertEqual(events,[(missing,'DELETE')])
+
+    def testInotifyWatch(self):
+        """
+        inotify reports changes, and removeWatch() takes away every
+        copy of a watchFn that was added more than once
+        """
+        events=[]
+        watchFn=lambda filename,action:events.append((filename,action))
+        fs=OsFilesystem(self.tmp)
+        d=fs.get(self.tmp)
+        d.addWatch(watchFn)
+        d.addWatch(watchFn)
+        try:
+            self._touch('new')
+            time.sleep(0.2)
+            self.assertEqual(events.count((os.path.join(self.tmp,'new'),'CREATE')),2)
+            d.removeWatch(watchFn)
+            events.clear()
+            self._touch('newer')
+            time.sleep(0.2)
+            self.assertEqual(events,[])
+            with self.assertRaises(OSError):
+                fs._addInotifyWatch(os.path.join(self.tmp,'missing'),watchFn) # pylint: disable=protected-access
+        finally:
+            fs.close()
+
+    def testSafeEditWatch(self):
+        """
+        watching a file keeps working after an editor saves it by
+        renaming a new file over the top, and reports when it's deleted
+        """
+        self._touch('f',data=b'old')
+        filename=os.path.join(self.tmp,'f')
+        events=[]
+        fs=OsFilesystem(self.tmp)
+        fs.get(filename).addWatch(lambda filename,action:events.append((filename,action)))
+        try:
+            self._touch('f.tmp',data=b'new')
+            os.replace(os.path.join(self.tmp,'f.tmp'),filename)
+            time.sleep(0.2)
+            self.assertIn((filename,'UPDATE'),events)
+            events.clear()
+            with open(filename,'ab') as f: # still watching the new file
+                f.write(b'more')
+            time.sleep(0.2)
+            self.assertIn((filename,'UPDATE'),events)
+            events.clear()
+            os.remove(filename)
+            time.sleep(0.2)
+            self.assertIn((filename,'DELETE'),events)
+        finally:
+            fs.close()
+
+    def testWatcherThread(self):
+        """
+        all inotify watches share one thread, which stops
+        once the last of them is removed
+        """
+        self._touch('a','b')
+        fs=OsFilesystem(self.tmp)
+        watchFn=lambda filename,action:None
+        thread=fs.get(os.path.join(self.tmp,'a')).addWatch(watchFn)
+        self.assertIs(fs.get(os.path.join(self.tmp,'b')).addWatch(watchFn),thread)
+        self.assertTrue(thread.is_alive())
+        fs.get(os.path.join(self.tmp,'a')).removeWatch(watchFn)
+        time.sleep(0.1)
+        self.assertTrue(thread.is_alive())
+        fs.get(os.path.join(self.tmp,'b')).removeWatch(watchFn)
+        thread.join(1)
+        self.assertFalse(thread.is_alive())
+        # and a new one starts when it is needed again
+        thread=fs.get(os.path.join(self.tmp,'a')).addWatch(watchFn)
+        self.assertTrue(thread.is_alive())
+        fs.close()
+        self.assertFalse(thread.is_alive())
+
         
 def testSuite():
     """
@@ -41,6 +307,17 @@ def testSuite():
     """
     testSuite = unittest.TestSuite()
     testSuite.addTest(Test("basic"))
+    testSuite.addTest(Test("testGlob"))
+    testSuite.addTest(Test("testChildren"))
+    testSuite.addTest(Test("testChildrenStats"))
+    testSuite.addTest(Test("testStatCache"))
+    testSuite.addTest(Test("testGetFsItem"))
+    testSuite.addTest(Test("testWrite"))
+    testSuite.addTest(Test("testCopyTo"))
+    testSuite.addTest(Test("testPollingWatch"))
+    testSuite.addTest(Test("testInotifyWatch"))
+    testSuite.addTest(Test("testSafeEditWatch"))
+    testSuite.addTest(Test("testWatcherThread"))
     print(testSuite)
     return testSuite
         